@@ -1,85 +1,322 @@
 import streamlit as st
 import google.generativeai as genai
-import requests
-from bs4 import BeautifulSoup
 import json
 import re
+from urllib.parse import quote_plus
+import hashlib
+import functools
+from itertools import islice
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from google.api_core.exceptions import NotFound
+import diskcache
+from pydantic import BaseModel, field_validator
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
 # Configure API Key (Use environment variables or secrets management in production)
 import os
 from dotenv import load_dotenv
 
+# Must be the first Streamlit command, before any cached resource can render a spinner
+st.set_page_config(page_title="AI Travel Planner", page_icon="✈️", layout="wide")
+
 # Load environment variables from .env file
 load_dotenv()
 
 # Access the API key
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
+# Attractions come from the itinerary response unless live Google results are requested
+USE_SERP_SCRAPE = os.getenv("USE_SERP_SCRAPE", "false").lower() in ("1", "true", "yes")
 
-try:
+
+BUDGET_OPTIONS = ["Budget", "Mid-range", "Luxury"]
+EXPERIENCE_TYPES = ["Most Famous", "Mix", "Offbeat Gems"]
+
+# Fixed instructions go in each model's system_instruction so requests only carry the
+# per-user details. CachedContent would need a pinned model version and a prefix above
+# its minimum token count, which these short instructions do not reach.
+_FIELDS = (
+    f"destination, duration (days), budget ({'/'.join(BUDGET_OPTIONS)}, default Mid-range), "
+    f"interests (list, from context), experience_type ({'/'.join(EXPERIENCE_TYPES)}, default Mix)"
+)
+_ITINERARY_FORMAT = (
+    'Start with "## Top 5 Attractions": 5 bullet points matching the experience type. '
+    "Then for each day: Morning/Afternoon/Evening/Dining (matching budget)/Transport. "
+    "Markdown with clear headings."
+)
+
+PARSE_INSTRUCTIONS = "Extract the travel request as JSON: " + _FIELDS + "."
+ITINERARY_INSTRUCTIONS = "Write a detailed travel itinerary. " + _ITINERARY_FORMAT
+COMBINED_INSTRUCTIONS = (
+    "Output the travel request as JSON between <<<JSON>>> and <<<END>>>: " + _FIELDS + ". "
+    "After <<<END>>>, write a detailed itinerary for it. " + _ITINERARY_FORMAT
+)
+
+REQUEST_PROMPT = 'Request: "{query}"'
+ITINERARY_PROMPT = (
+    "Trip: {duration} days in {destination}, {budget} budget. "
+    "Interests: {interests}. Experience type: {experience_type}."
+)
+
+
+@st.cache_resource
+def load_model(model_name, system_instruction):
+    """
+    Configures Gemini once per process instead of on every Streamlit rerun.
+    """
     genai.configure(api_key=GEMINI_API_KEY)
-    model = genai.GenerativeModel("gemini-1.5-pro-latest")
+    return genai.GenerativeModel(model_name, system_instruction=system_instruction)
+
+
+try:
+    # Flash handles the simple text-to-JSON extraction, Pro writes the itineraries and plans
+    MODEL_FAST = load_model("gemini-1.5-flash-latest", PARSE_INSTRUCTIONS)
+    MODEL_PRO = load_model("gemini-1.5-pro-latest", ITINERARY_INSTRUCTIONS)
+    MODEL_PLAN = load_model("gemini-1.5-pro-latest", COMBINED_INSTRUCTIONS)
     st.session_state.debug_mode = False  # Initialize debug mode
 except Exception as e:
     st.error(f"API Configuration Error: {str(e)}")
     st.stop()
 
 
+# LLM response cache (exact match on disk, optional semantic match via FAISS)
+LLM_CACHE_TTL = 7 * 24 * 60 * 60  # 7 days
+SEMANTIC_THRESHOLD = 0.95
+_NUMBER_RE = re.compile(r"\d+")
+
+
+@st.cache_resource
+def get_llm_cache():
+    return diskcache.Cache(os.getenv("LLM_CACHE_DIR", ".llm_cache"))
+
+
+@st.cache_resource
+def get_cache_stats():
+    # Process-wide so the counters survive reruns and show in the debug sidebar
+    return {"hits": 0, "misses": 0}
+
+
+LLM_CACHE = get_llm_cache()
+stats = get_cache_stats()
+
+
+@st.cache_resource(show_spinner=False)
+def get_embedder():
+    """
+    Loads the sentence embedding model once per process.
+    Returns None when sentence-transformers is not installed.
+    """
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError:
+        return None
+    return SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
+
+
+def _normalize(value):
+    """
+    Normalizes a prompt argument: whitespace/case for text, canonical JSON for dicts.
+    """
+    if isinstance(value, str):
+        return " ".join(value.lower().split())
+    return json.dumps(value, sort_keys=True)
+
+
+@st.cache_resource(show_spinner=False)
+def _get_semantic_index(namespace):
+    """
+    Builds the namespace's FAISS index from cached embeddings, once per process.
+    Returns (index, (cache key, prompt) by row, lock guarding both), or None when sentence-transformers or faiss are not installed.
+    """
+    embedder = get_embedder()
+    if embedder is None:
+        return None
+    try:
+        import faiss
+        import numpy as np
+    except ImportError:
+        return None
+    index = faiss.IndexFlatIP(embedder.get_sentence_embedding_dimension())
+    keys = []
+    for cache_key in LLM_CACHE.iterkeys():
+        if isinstance(cache_key, tuple) and cache_key[:2] == ("embedding", namespace):
+            entry = LLM_CACHE.get(cache_key)
+            if entry is not None:
+                index.add(np.asarray(entry["vector"], dtype="float32"))
+                keys.append((cache_key[2], entry["prompt"]))
+    # Shared by every session thread, so rows and keys must be read and extended together
+    return index, keys, threading.Lock()
+
+
+def _embed(text):
+    # Normalized embeddings make inner product equal to cosine similarity
+    return get_embedder().encode([text], normalize_embeddings=True).astype("float32")
+
+
+def _cache_lookup(namespace, arg, semantic, semantic_check=None):
+    """
+    Looks up a cached result for arg within a function's cache namespace, falling back
+    to the semantic index. A semantic hit is only used when both prompts contain the same
+    numbers and semantic_check(arg, result), if given, accepts it.
+    Returns the cache key, normalized prompt and cached result (or None).
+    """
+    prompt = _normalize(arg)
+    key = hashlib.sha256(
+        json.dumps({"fn": namespace, "prompt": prompt}, sort_keys=True).encode()
+    ).hexdigest()
+
+    result = LLM_CACHE.get(key)
+    semantic_index = _get_semantic_index(namespace) if semantic and result is None else None
+    if semantic_index is not None:
+        index, keys, lock = semantic_index
+        vector = _embed(prompt)
+        with lock:
+            hit = None
+            if index.ntotal:
+                scores, ids = index.search(vector, 1)
+                if scores[0][0] > SEMANTIC_THRESHOLD:
+                    hit = keys[ids[0][0]]
+        if hit is not None:
+            hit_key, hit_prompt = hit
+            if sorted(_NUMBER_RE.findall(hit_prompt)) == sorted(_NUMBER_RE.findall(prompt)):
+                candidate = LLM_CACHE.get(hit_key)
+                if candidate is not None and (semantic_check is None or semantic_check(arg, candidate)):
+                    result = candidate
+
+    stats["hits" if result is not None else "misses"] += 1
+    return key, prompt, result
+
+
+def _cache_store(namespace, key, prompt, result, semantic):
+    LLM_CACHE.set(key, result, expire=LLM_CACHE_TTL)
+    semantic_index = _get_semantic_index(namespace) if semantic else None
+    if semantic_index is not None:
+        index, keys, lock = semantic_index
+        vector = _embed(prompt)
+        LLM_CACHE.set(("embedding", namespace, key), {"vector": vector.tolist(), "prompt": prompt},
+                      expire=LLM_CACHE_TTL)
+        with lock:
+            index.add(vector)
+            keys.append((key, prompt))
+
+
+def llm_cache(version, semantic=False, cache_if=lambda result: result is not None, semantic_check=None):
+    """
+    Caches results of an LLM-backed function keyed by its normalized first argument.
+    version lists what shapes the response (model name, instructions, templates) so
+    entries written before a prompt or model change are not reused.
+    With semantic=True, paraphrased prompts above SEMANTIC_THRESHOLD reuse a cached result
+    that passes semantic_check(arg, result).
+    """
+    def decorator(fn):
+        namespace = hashlib.sha256(
+            json.dumps({"fn": fn.__name__, "version": version}, sort_keys=True).encode()
+        ).hexdigest()
+
+        @functools.wraps(fn)
+        def wrapper(arg, *args, **kwargs):
+            key, prompt, result = _cache_lookup(namespace, arg, semantic, semantic_check)
+            if result is None:
+                result = fn(arg, *args, **kwargs)
+                if cache_if(result):
+                    _cache_store(namespace, key, prompt, result, semantic)
+            return result
+        return wrapper
+    return decorator
+
+
+class TravelRequest(BaseModel):
+    """
+    Structured travel request with defaults for the optional fields.
+    """
+    destination: str
+    duration: int
+    budget: str = "Mid-range"
+    interests: list[str] = []
+    experience_type: str = "Mix"
+
+    @field_validator("interests", mode="before")
+    @classmethod
+    def _coerce_interests(cls, value):
+        # Clean up interests if provided as a single string
+        if value is None:
+            return []
+        if isinstance(value, str):
+            return [value]
+        return value
+
+
+# Gemini response_schema for TravelRequest: every field is required so the model fills
+# in the prompt's defaults itself, and the enums pin the values the UI understands
+TRAVEL_REQUEST_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "destination": {"type": "string"},
+        "duration": {"type": "integer"},
+        "budget": {"type": "string", "format": "enum", "enum": BUDGET_OPTIONS},
+        "interests": {"type": "array", "items": {"type": "string"}},
+        "experience_type": {"type": "string", "format": "enum", "enum": EXPERIENCE_TYPES}
+    },
+    "required": ["destination", "duration", "budget", "interests", "experience_type"]
+}
+
+_FENCE_RE = re.compile(r'```json|```')
+
+
+def _parsed_matches_query(query, data):
+    """
+    Checks a semantically similar cached parse against the new query, rejecting it when
+    the destination or any interest is not mentioned, or the budget/experience type differs
+    from what the query asks for (or the default when it asks for none).
+    """
+    text = _normalize(query)
+    if data['destination'].lower() not in text:
+        return False
+    # Interests come from the query's wording, so each should show up in it (loosely, to allow plurals)
+    for interest in data['interests']:
+        if not any(word[:max(4, len(word) - 2)] in text for word in interest.lower().split()):
+            return False
+    budgets = [option for option in BUDGET_OPTIONS if option.lower() in text]
+    if len(budgets) > 1 and "Budget" in budgets:  # "mid-range budget" or "luxury budget" is one choice
+        budgets.remove("Budget")
+    experiences = [option for option in EXPERIENCE_TYPES if option.lower() in text]
+    # Without an explicit choice the fresh parse would use the default, so expect that
+    for mentioned, default, field in ((budgets, "Mid-range", 'budget'), (experiences, "Mix", 'experience_type')):
+        expected = mentioned[0] if len(mentioned) == 1 else (default if not mentioned else None)
+        if expected is not None and data[field] != expected:
+            return False
+    return True
+
+
+@llm_cache([MODEL_FAST.model_name, PARSE_INSTRUCTIONS, REQUEST_PROMPT, TRAVEL_REQUEST_SCHEMA],
+           semantic=True, semantic_check=_parsed_matches_query)
 def parse_natural_language(query):
     """
     Parses the user query and converts it into structured JSON data.
     Handles missing values, vague inputs, and assigns default values where needed.
     """
-    prompt = f"""
-    Convert this travel request to JSON format:
-    "{query}"
-    
-    Required fields:
-    - destination (specific location)
-    - duration (in days, as a number)
-    
-    Optional fields with defaults:
-    - budget ("Budget", "Mid-range", "Luxury") - default to "Mid-range"
-    - interests (list of activities) - extract from context
-    - experience_type ("Most Famous", "Mix", "Offbeat Gems") - default to "Mix"
-    
-    Example output for "5 days in Kerala with nature focus":
-    {{
-        "destination": "Kerala",
-        "duration": 5,
-        "budget": "Mid-range",
-        "interests": ["Nature"],
-        "experience_type": "Mix"
-    }}
-    """
+    prompt = REQUEST_PROMPT.format(query=query)
     
     try:
-        response = model.generate_content(prompt)
+        response = MODEL_FAST.generate_content(prompt, generation_config={
+            "response_mime_type": "application/json",
+            "response_schema": TRAVEL_REQUEST_SCHEMA
+        })
         if st.session_state.debug_mode:
             st.write("Raw API Response:", response.text)
             
-        json_str = re.sub(r'```json|```', '', response.text).strip()
+        json_str = response.text.strip()
         
         try:
-            data = json.loads(json_str)
-            required_fields = ['destination', 'duration']
-            if not all(field in data for field in required_fields):
-                raise ValueError("Missing required fields")
-            
-            data.setdefault('budget', 'Mid-range')
-            data.setdefault('interests', [])
-            data.setdefault('experience_type', 'Mix')
-            
-            # Clean up interests if provided
-            if 'interests' in data and isinstance(data['interests'], str):
-                data['interests'] = [data['interests']]
+            # ValidationError subclasses ValueError and covers malformed JSON too
+            data = TravelRequest.model_validate_json(json_str).model_dump()
             
             if st.session_state.debug_mode:
                 st.write("Parsed Data:", data)
             return data
         
-        except (json.JSONDecodeError, ValueError) as e:
+        except ValueError as e:
             if st.session_state.debug_mode:
                 st.error(f"JSON Parsing Error: {str(e)}")
                 st.write("Problematic JSON string:", json_str)
@@ -91,60 +328,325 @@ def parse_natural_language(query):
         return None
 
 
+@st.cache_resource(show_spinner=False)
+def get_session():
+    """
+    Shared HTTP session so pooled keep-alive connections survive Streamlit reruns.
+    Successful SERP responses are cached on disk for a day.
+    """
+    # Scraping is off by default, so its dependencies load on first use only
+    from requests.adapters import HTTPAdapter
+    from requests_cache import CachedSession
+
+    session = CachedSession("serp_cache", backend="sqlite", expire_after=86400)
+    # requests only decodes brotli when the brotli package is installed
+    session.headers.update({"User-Agent": "Mozilla/5.0", "Accept-Encoding": "gzip, deflate"})
+    # Retries are handled by get_serp_fetcher so they back off and count against the rate limit
+    adapter = HTTPAdapter(pool_connections=10, pool_maxsize=10)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+SERP_CALLS_PER_MINUTE = 10
+MAX_RETRY_AFTER = 5  # seconds; longer Retry-After values give up instead of blocking the page
+
+
+def _retry_after(exc):
+    # Seconds requested by a Retry-After header, or None when absent or not a number
+    response = getattr(exc, "response", None)
+    retry_after = response.headers.get("Retry-After", "") if response is not None else ""
+    return int(retry_after) if retry_after.isdigit() else None
+
+
+def _is_retryable(exc):
+    # Connection problems, timeouts, rate limiting and server errors are worth retrying,
+    # unless the server asks us to wait longer than MAX_RETRY_AFTER
+    import requests
+    if isinstance(exc, requests.HTTPError):
+        if exc.response is None or not (exc.response.status_code == 429 or exc.response.status_code >= 500):
+            return False
+        retry_after = _retry_after(exc)
+        return retry_after is None or retry_after <= MAX_RETRY_AFTER
+    return isinstance(exc, (requests.ConnectionError, requests.Timeout))
+
+
+def _wait_for_retry(retry_state):
+    """
+    Honors a Retry-After header when present, otherwise backs off exponentially.
+    """
+    retry_after = _retry_after(retry_state.outcome.exception())
+    if retry_after is not None:
+        return retry_after
+    from tenacity import wait_exponential
+    return wait_exponential(multiplier=0.2, max=2)(retry_state)
+
+
+@st.cache_resource(show_spinner=False)
+def get_serp_fetcher(_session):
+    """
+    Builds the SERP fetch function once per process so every session shares its rate limit,
+    which only counts requests that actually reach Google.
+    """
+    from ratelimit import limits
+    from tenacity import retry, retry_if_exception, stop_after_attempt
+
+    @limits(calls=SERP_CALLS_PER_MINUTE, period=60)
+    def fetch_from_network(url):
+        return _session.get(url, timeout=10)
+
+    @retry(stop=stop_after_attempt(3), wait=_wait_for_retry,
+           retry=retry_if_exception(_is_retryable), reraise=True)
+    def fetch(url):
+        # Fresh responses already in the sqlite cache should not use up the Google quota
+        response = _session.get(url, only_if_cached=True)
+        # A cache miss comes back as a synthetic 504 "Not Cached" that still reports from_cache
+        if response.status_code == 504 and response.reason == "Not Cached":
+            response = fetch_from_network(url)
+        response.raise_for_status()
+        return response
+
+    return fetch
+
+
+_QUERY_TEMPLATES = {
+    "Most Famous": "top 10 attractions in {}",
+    "Mix": "best things to do in {}",
+    "Offbeat Gems": "hidden gems in {}"
+}
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _scrape_attractions(destination, experience_type):
+    """
+    Scrapes attraction names from Google. Errors propagate so failures are not cached.
+    """
+    from selectolax.lexbor import LexborHTMLParser
+
+    query = _QUERY_TEMPLATES[experience_type].format(destination)
+    url = f"https://www.google.com/search?q={quote_plus(query)}"
+    
+    response = get_serp_fetcher(get_session())(url)
+    tree = LexborHTMLParser(response.text)
+    # Extract each heading's text once and stop after the 5 we display
+    return list(islice(
+        (t for n in tree.css("h3") if (t := n.text()) and "›" not in t),
+        5
+    ))
+
+
+ATTRACTIONS_FALLBACK = "Attractions list unavailable"
+
+
 def get_top_attractions(destination, experience_type="Mix"):
     """
     Retrieves top attractions for a given destination based on user preferences.
     """
-    query_types = {
-        "Most Famous": f"top 10 attractions in {destination}",
-        "Mix": f"best things to do in {destination}",
-        "Offbeat Gems": f"hidden gems in {destination}"
-    }
-    url = f"https://www.google.com/search?q={query_types[experience_type].replace(' ', '+')}"
-    headers = {"User-Agent": "Mozilla/5.0"}
-    
     try:
-        response = requests.get(url, headers=headers, timeout=10)
-        soup = BeautifulSoup(response.text, "html.parser")
-        return [h3.text for h3 in soup.find_all("h3")[:7] if h3.text and "›" not in h3.text]
+        return _scrape_attractions(destination, experience_type)
     except Exception as e:
         if st.session_state.debug_mode:
             st.error(f"Attractions Error: {str(e)}")
-        return ["Attractions list unavailable"]
+        return [ATTRACTIONS_FALLBACK]
 
 
-def generate_itinerary(data):
+ITINERARY_FALLBACK = "Could not generate itinerary. Please try again with more details."
+
+
+@llm_cache([MODEL_PRO.model_name, ITINERARY_INSTRUCTIONS, ITINERARY_PROMPT],
+           cache_if=lambda text: text != ITINERARY_FALLBACK)
+def generate_itinerary(data, placeholder=None):
     """
     Generates a structured travel itinerary based on user inputs.
+    Streams partial markdown into placeholder as tokens arrive and returns the full text.
     """
-    prompt = f"""
-    Create a detailed {data['duration']}-day {data['budget']} itinerary for {data['destination']}.
-    
-    Preferences:
-    - Interests: {', '.join(data['interests']) if data['interests'] else 'Not specified'}
-    - Experience Type: {data['experience_type']}
-    
-    Include these sections for each day:
-    - Morning activities
-    - Afternoon activities
-    - Evening activities
-    - Recommended dining options matching the budget
-    - Transportation tips between locations
+    prompt = ITINERARY_PROMPT.format(
+        duration=data['duration'],
+        budget=data['budget'],
+        destination=data['destination'],
+        interests=', '.join(data['interests']) if data['interests'] else 'Not specified',
+        experience_type=data['experience_type']
+    )
+    try:
+        response = MODEL_PRO.generate_content(prompt, stream=True)
+        text = ""
+        for chunk in response:
+            text += chunk.text
+            if placeholder is not None:
+                placeholder.markdown(text)
+        return text
+    except Exception as e:
+        if st.session_state.debug_mode:
+            st.error(f"Itinerary Generation Error: {str(e)}")
+        return ITINERARY_FALLBACK
+
+
+@st.cache_resource
+def get_executor():
+    """
+    Shared worker pool for blocking I/O so it is not recreated on every rerun.
+    """
+    return ThreadPoolExecutor(max_workers=8)
+
+
+EXECUTOR = get_executor()
+
+
+def submit(fn, *args):
+    """
+    Runs fn on the shared executor with this session's Streamlit context attached.
+    """
+    ctx = get_script_run_ctx()
+
+    def run():
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return fn(*args)
+
+    return EXECUTOR.submit(run)
+
+
+def attractions_result(future, timeout=30):
+    """
+    Waits for a submitted get_top_attractions call, falling back when it takes too long.
+    """
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeoutError:
+        if st.session_state.debug_mode:
+            st.error("Attractions Error: timed out")
+        return [ATTRACTIONS_FALLBACK]
+
+
+_ATTRACTIONS_RE = re.compile(
+    r"^[ \t]*#+[ \t]*Top 5 Attractions[^\n]*\n(.*?)(?=\n[ \t]*#|\Z)",
+    re.DOTALL | re.IGNORECASE | re.MULTILINE
+)
+_BULLET_RE = re.compile(r"^\s*(?:[-*]|\d+\.)\s+(.+)$", re.MULTILINE)
+
+
+def split_attractions(itinerary):
+    """
+    Splits the "Top 5 Attractions" section out of the itinerary markdown, wherever a
+    preamble or title puts it. Returns (attractions, remaining itinerary).
+    """
+    match = _ATTRACTIONS_RE.search(itinerary)
+    if not match:
+        return [ATTRACTIONS_FALLBACK], itinerary
+    attractions = [item.strip() for item in _BULLET_RE.findall(match.group(1))]
+    remaining = (itinerary[:match.start()] + itinerary[match.end():]).strip()
+    return attractions or [ATTRACTIONS_FALLBACK], remaining
+
+
+def fetch_trip_content(data, itinerary_placeholder=None, attractions_future=None):
+    """
+    Fetches attractions and the itinerary. When USE_SERP_SCRAPE is set, Google is scraped
+    on the executor while the itinerary streams in, reusing attractions_future if given.
+    """
+    if not USE_SERP_SCRAPE:
+        itinerary = generate_itinerary(data, itinerary_placeholder)
+        return split_attractions(itinerary)
     
-    Format the response in markdown with clear headings.
+    f_attr = attractions_future or submit(get_top_attractions, data['destination'], data['experience_type'])
+    itinerary = generate_itinerary(data, itinerary_placeholder)
+    return attractions_result(f_attr), split_attractions(itinerary)[1]
+
+
+_COMBINED_RE = re.compile(r"<<<JSON>>>(.*?)<<<END>>>(.*)", re.DOTALL)
+_TRAILING_FENCE_RE = re.compile(r"\s*```\s*\Z")
+_LEADING_FENCE_RE = re.compile(r"\A\s*```\s*")
+
+
+def split_combined(text):
     """
+    Splits a single-call response into its JSON header and itinerary markdown, allowing a
+    preamble or an opening code fence before <<<JSON>>>.
+    Returns (json_str, itinerary), or None while the header is incomplete.
+    """
+    match = _COMBINED_RE.search(text)
+    if not match:
+        return None
+    itinerary = match.group(2)
+    if "```" in text[:match.start()]:
+        # The fence opened before the header closes either right after it or after the itinerary
+        itinerary = _TRAILING_FENCE_RE.sub("", _LEADING_FENCE_RE.sub("", itinerary, count=1))
+    return _FENCE_RE.sub('', match.group(1)).strip(), itinerary
+
+
+@llm_cache([MODEL_PLAN.model_name, COMBINED_INSTRUCTIONS, REQUEST_PROMPT])
+def parse_and_generate(query, placeholder=None, on_parsed=None):
+    """
+    Parses the user query and generates the itinerary in a single Gemini call.
+    Calls on_parsed(data) as soon as the JSON header arrives, then streams the itinerary.
+    Returns (data, itinerary), or None when the response does not follow the expected structure.
+    """
+    prompt = REQUEST_PROMPT.format(query=query)
     try:
-        response = model.generate_content(prompt)
-        return response.text
+        response = MODEL_PLAN.generate_content(prompt, stream=True)
+        text = ""
+        data = None
+        itinerary = ""
+        for chunk in response:
+            text += chunk.text
+            parts = split_combined(text)
+            if parts is None:
+                continue
+            json_str, itinerary = parts
+            if data is None:
+                data = TravelRequest.model_validate_json(json_str).model_dump()
+                if on_parsed is not None:
+                    on_parsed(data)
+            if placeholder is not None:
+                placeholder.markdown(itinerary)
+        
+        itinerary = itinerary.strip()
+        if not itinerary:
+            raise ValueError("Response did not contain a JSON header and itinerary")
+        if st.session_state.debug_mode:
+            st.write("Parsed Data:", data)
+        return data, itinerary
     except Exception as e:
         if st.session_state.debug_mode:
-            st.error(f"Itinerary Generation Error: {str(e)}")
-        return "Could not generate itinerary. Please try again with more details."
+            st.error(f"Combined Request Error: {str(e)}")
+        return None
 
 
-# Configure Streamlit UI
-st.set_page_config(page_title="AI Travel Planner", page_icon="✈️", layout="wide")
+def plan_trip(query, itinerary_placeholder=None):
+    """
+    Plans a trip from a natural language query with one Gemini call, scraping attractions
+    as soon as the destination is known when USE_SERP_SCRAPE is set.
+    Falls back to separate parse and itinerary calls.
+    Returns (data, attractions, itinerary), or None when the query could not be parsed.
+    """
+    scrape = {}
+
+    def start_scrape(data):
+        if USE_SERP_SCRAPE:
+            scrape["args"] = (data['destination'], data['experience_type'])
+            scrape["future"] = submit(get_top_attractions, *scrape["args"])
+
+    combined = parse_and_generate(query, itinerary_placeholder, start_scrape)
+    if combined is None:
+        data = parse_natural_language(query)
+        pending = scrape.get("future")
+        # A running future cannot be cancelled, so keep it when the fallback parse agrees
+        if pending is not None and (not data or scrape["args"] != (data['destination'], data['experience_type'])):
+            pending.cancel()
+            pending = None
+        if not data:
+            return None
+        attractions, itinerary = fetch_trip_content(data, itinerary_placeholder, pending)
+        return data, attractions, itinerary
+
+    data, itinerary = combined
+    attractions, itinerary = split_attractions(itinerary)
+    if USE_SERP_SCRAPE:
+        if "future" not in scrape:  # cached result, the header callback never ran
+            start_scrape(data)
+        attractions = attractions_result(scrape["future"])
+    return data, attractions, itinerary
+
 
+# Configure Streamlit UI
 # Sidebar options
 with st.sidebar:
     st.header("Settings")
@@ -152,6 +654,10 @@ with st.sidebar:
     st.session_state.debug_mode = st.checkbox("Debug Mode", False)
     if st.session_state.debug_mode:
         st.info("Debug mode activated. Additional information will be shown.")
+        st.write("LLM Cache:", stats)
+        if st.button("Clear SERP Cache"):
+            get_session().cache.clear()
+            _scrape_attractions.clear()
 
 st.title("AI Travel Planner")
 st.caption("Powered by AI for personalized travel planning")
@@ -170,34 +676,42 @@ if input_mode == "Natural Language":
             st.stop()
             
         with st.spinner("Processing your request..."):
-            parsed_data = parse_natural_language(user_query)
+            # Reserve the layout up front so the itinerary can stream in below the summary
+            results = st.empty()
+            with results.container():
+                summary = st.container()
+                st.subheader("Your Personalized Itinerary")
+                itinerary_placeholder = st.empty()
             
-            if parsed_data:
-                st.success("Successfully parsed your request!")
-                
-                with st.expander("Show parsed details", expanded=False):
-                    st.json(parsed_data)
-                
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    st.subheader(f"Top {parsed_data['experience_type']} Attractions")
-                    attractions = get_top_attractions(parsed_data['destination'], parsed_data['experience_type'])
-                    st.write("\n".join([f"- {attr}" for attr in attractions[:5]]))
+            planned = plan_trip(user_query, itinerary_placeholder)
+            
+            if planned:
+                parsed_data, attractions, itinerary = planned
                 
-                with col2:
-                    st.subheader("Trip Summary")
-                    st.write(f"**Destination:** {parsed_data['destination']}")
-                    st.write(f"**Duration:** {parsed_data['duration']} days")
-                    st.write(f"**Budget:** {parsed_data['budget']}")
-                    st.write(f"**Interests:** {', '.join(parsed_data['interests']) if parsed_data['interests'] else 'Not specified'}")
+                with summary:
+                    st.success("Successfully parsed your request!")
+                    
+                    with st.expander("Show parsed details", expanded=False):
+                        st.json(parsed_data)
+                    
+                    col1, col2 = st.columns(2)
+                    
+                    with col1:
+                        st.subheader(f"Top {parsed_data['experience_type']} Attractions")
+                        st.write("\n".join([f"- {attr}" for attr in attractions[:5]]))
+                    
+                    with col2:
+                        st.subheader("Trip Summary")
+                        st.write(f"**Destination:** {parsed_data['destination']}")
+                        st.write(f"**Duration:** {parsed_data['duration']} days")
+                        st.write(f"**Budget:** {parsed_data['budget']}")
+                        st.write(f"**Interests:** {', '.join(parsed_data['interests']) if parsed_data['interests'] else 'Not specified'}")
                 
-                st.subheader("Your Personalized Itinerary")
-                itinerary = generate_itinerary(parsed_data)
-                st.markdown(itinerary)
+                itinerary_placeholder.markdown(itinerary)
                 
                 st.session_state.parsed_data = parsed_data
             else:
+                results.empty()
                 st.error("Could not process your request. Please include:")
                 st.markdown("""
                 - Destination (e.g., "Kerala")
@@ -212,23 +726,23 @@ else:  # Form input mode
         st.subheader("Enter Trip Details")
         destination = st.text_input("Destination", placeholder="e.g., Kerala, Japan")
         days = st.slider("Duration (days)", 1, 21, 5)
-        budget = st.selectbox("Budget", ["Budget", "Mid-range", "Luxury"], index=1)
+        budget = st.selectbox("Budget", BUDGET_OPTIONS, index=1)
         interests = st.multiselect("Interests", 
                                  ["Adventure", "Food", "History", "Nature", "Shopping", "Relaxation", "Culture"],
                                  default=["Nature"])
         experience_type = st.radio("Experience Type", 
-                                 ["Most Famous", "Mix", "Offbeat Gems"], 
+                                 EXPERIENCE_TYPES, 
                                  horizontal=True, index=1)
         
         if st.form_submit_button("Generate Itinerary"):
             with st.spinner("Creating your personalized itinerary..."):
-                data = {
+                data = TravelRequest.model_validate({
                     "destination": destination,
                     "duration": days,
                     "budget": budget,
                     "interests": interests,
                     "experience_type": experience_type
-                }
+                }, strict=True).model_dump()
                 
                 st.session_state.parsed_data = data
                 
@@ -236,8 +750,7 @@ else:  # Form input mode
                 
                 with col1:
                     st.subheader(f"Top {experience_type} Attractions")
-                    attractions = get_top_attractions(destination, experience_type)
-                    st.write("\n".join([f"- {attr}" for attr in attractions[:5]]))
+                    attractions_placeholder = st.empty()
                 
                 with col2:
                     st.subheader("Trip Summary")
@@ -247,8 +760,10 @@ else:  # Form input mode
                     st.write(f"**Interests:** {', '.join(interests)}")
                 
                 st.subheader("Your Personalized Itinerary")
-                itinerary = generate_itinerary(data)
-                st.markdown(itinerary)
+                itinerary_placeholder = st.empty()
+                attractions, itinerary = fetch_trip_content(data, itinerary_placeholder)
+                attractions_placeholder.write("\n".join([f"- {attr}" for attr in attractions[:5]]))
+                itinerary_placeholder.markdown(itinerary)
 
 # Debug information
 if st.session_state.debug_mode and 'parsed_data' in st.session_state:
@@ -0,0 +1,37 @@
+"""
+Loads selected top-level definitions out of app.py without running it.
+
+app.py is a Streamlit script that configures Gemini and renders the UI on import,
+so tests execute only the functions and constants they need. Streamlit caching
+decorators (st.cache_resource / st.cache_data) are dropped, so every load builds
+fresh objects.
+"""
+import ast
+import json
+import re
+from pathlib import Path
+
+APP = Path(__file__).resolve().parent.parent / "app.py"
+
+
+def _is_streamlit_decorator(node):
+    target = node.func if isinstance(node, ast.Call) else node
+    return isinstance(target, ast.Attribute) and getattr(target.value, "id", None) == "st"
+
+
+def load(*names):
+    """
+    Executes the named top-level functions and assignments from app.py in file order.
+    Returns the resulting namespace.
+    """
+    tree = ast.parse(APP.read_text(encoding="utf-8"))
+    nodes = []
+    for node in tree.body:
+        if isinstance(node, ast.FunctionDef) and node.name in names:
+            node.decorator_list = [d for d in node.decorator_list if not _is_streamlit_decorator(d)]
+            nodes.append(node)
+        elif isinstance(node, ast.Assign) and any(getattr(t, "id", None) in names for t in node.targets):
+            nodes.append(node)
+    namespace = {"json": json, "re": re}
+    exec(compile(ast.Module(body=nodes, type_ignores=[]), str(APP), "exec"), namespace)
+    return namespace
@@ -0,0 +1,31 @@
+"""
+Tests for the check that guards semantic cache hits on parse_natural_language.
+"""
+from app_source import load
+
+
+matches = load("BUDGET_OPTIONS", "EXPERIENCE_TYPES", "_normalize", "_parsed_matches_query")["_parsed_matches_query"]
+
+
+def _parsed(**overrides):
+    data = {"destination": "Kerala", "duration": 5, "budget": "Mid-range",
+            "interests": [], "experience_type": "Mix"}
+    data.update(overrides)
+    return data
+
+
+def test_accepts_matching_parse():
+    assert matches("5 days in Kerala for beaches", _parsed(interests=["Beaches"]))
+
+
+def test_rejects_other_destination():
+    assert not matches("5 days in Goa", _parsed())
+
+
+def test_budget_word_does_not_count_as_a_second_choice():
+    assert matches("luxury budget trip to Kerala", _parsed(budget="Luxury"))
+    assert not matches("luxury budget trip to Kerala", _parsed())
+
+
+def test_rejects_interests_not_in_query():
+    assert not matches("5 days in Kerala for beaches", _parsed(interests=["Wildlife"]))
@@ -0,0 +1,72 @@
+"""
+Tests for the pure response-parsing helpers in app.py.
+"""
+from app_source import load
+
+
+namespace = load("ATTRACTIONS_FALLBACK", "_ATTRACTIONS_RE", "_BULLET_RE", "split_attractions")
+split_attractions = namespace["split_attractions"]
+
+
+def test_split_attractions_at_start():
+    attractions, rest = split_attractions(
+        "## Top 5 Attractions\n- Munnar\n* Alleppey\n1. Kochi\n\n## Day 1\nTea gardens"
+    )
+    assert attractions == ["Munnar", "Alleppey", "Kochi"]
+    assert rest == "## Day 1\nTea gardens"
+
+
+def test_split_attractions_after_preamble():
+    attractions, rest = split_attractions(
+        "Here is your itinerary!\n\n## Top 5 Attractions\n- **Munnar** hills\n- Kochi\n\n## Day 1\nBeach"
+    )
+    assert attractions == ["**Munnar** hills", "Kochi"]
+    assert rest == "Here is your itinerary!\n\n\n## Day 1\nBeach"
+
+
+def test_split_attractions_after_h1_title():
+    attractions, rest = split_attractions(
+        "# 5-Day Kerala Itinerary\n\n### Top 5 Attractions:\n- Munnar\n\n## Day 1\nBeach"
+    )
+    assert attractions == ["Munnar"]
+    assert rest.startswith("# 5-Day Kerala Itinerary")
+    assert "Top 5 Attractions" not in rest and "## Day 1\nBeach" in rest
+
+
+def test_split_attractions_missing_section():
+    itinerary = "# Kerala\n## Day 1\nBeach"
+    assert split_attractions(itinerary) == ([namespace["ATTRACTIONS_FALLBACK"]], itinerary)
+
+
+split_combined = load("_FENCE_RE", "_COMBINED_RE", "_TRAILING_FENCE_RE", "_LEADING_FENCE_RE",
+                      "split_combined")["split_combined"]
+
+
+def test_split_combined_plain():
+    assert split_combined('<<<JSON>>>{"destination": "Kerala"}<<<END>>>\n## Day 1') == (
+        '{"destination": "Kerala"}', "\n## Day 1"
+    )
+
+
+def test_split_combined_after_preamble():
+    json_str, itinerary = split_combined('Sure! Here is your plan.\n<<<JSON>>>{"duration": 5}<<<END>>>## Day 1')
+    assert json_str == '{"duration": 5}'
+    assert itinerary == "## Day 1"
+
+
+def test_split_combined_inside_code_fences():
+    json_str, itinerary = split_combined(
+        '```\n<<<JSON>>>\n```json\n{"duration": 5}\n```\n<<<END>>>\n## Day 1\nBeach\n```'
+    )
+    assert json_str == '{"duration": 5}'
+    assert itinerary.strip() == "## Day 1\nBeach"
+
+
+def test_split_combined_only_header_fenced():
+    json_str, itinerary = split_combined('```\n<<<JSON>>>{"duration": 5}<<<END>>>\n```\n## Day 1\nBeach')
+    assert json_str == '{"duration": 5}'
+    assert itinerary == "## Day 1\nBeach"
+
+
+def test_split_combined_incomplete_header():
+    assert split_combined('<<<JSON>>>{"duration": 5') is None
@@ -0,0 +1,86 @@
+"""
+Tests for the SERP fetcher in app.py against a local HTTP server.
+"""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+requests = pytest.importorskip("requests")
+requests_cache = pytest.importorskip("requests_cache")
+pytest.importorskip("tenacity")
+pytest.importorskip("ratelimit")
+
+from app_source import load  # noqa: E402
+
+
+class _Handler(BaseHTTPRequestHandler):
+    hits = 0
+    status = 200
+    retry_after = None
+
+    def do_GET(self):
+        type(self).hits += 1
+        body = b"<html><body><h3>Munnar</h3></body></html>"
+        self.send_response(self.status)
+        if self.retry_after is not None:
+            self.send_header("Retry-After", self.retry_after)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    handler = type("Handler", (_Handler,), {"hits": 0})
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}/search?q=kerala", handler
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def fetcher():
+    namespace = load("SERP_CALLS_PER_MINUTE", "MAX_RETRY_AFTER", "_retry_after", "_is_retryable",
+                     "_wait_for_retry", "get_serp_fetcher")
+    session = requests_cache.CachedSession("serp_test", backend="memory", expire_after=60)
+    return namespace["get_serp_fetcher"](session)
+
+
+def test_cold_cache_fetches_from_network(server, fetcher):
+    url, handler = server
+    response = fetcher(url)
+    assert response.status_code == 200
+    assert "Munnar" in response.text
+    assert handler.hits == 1
+
+
+def test_warm_cache_skips_network(server, fetcher):
+    url, handler = server
+    fetcher(url)
+    response = fetcher(url)
+    assert response.status_code == 200
+    assert response.from_cache
+    assert handler.hits == 1
+
+
+def test_short_retry_after_is_retried(server, fetcher):
+    url, handler = server
+    handler.status, handler.retry_after = 429, "0"
+    with pytest.raises(requests.HTTPError):
+        fetcher(url)
+    assert handler.hits == 3
+
+
+def test_long_retry_after_gives_up(server, fetcher):
+    url, handler = server
+    handler.status, handler.retry_after = 429, "3600"
+    with pytest.raises(requests.HTTPError):
+        fetcher(url)
+    assert handler.hits == 1